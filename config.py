@@ -53,6 +53,9 @@ REMOVE_URLS_LIST: set = config(
 DISABLE_EDIT: bool = config("DISABLE_EDIT", cast=bool, default=False)
 DISABLE_DELETE: bool = config("DISABLE_DELETE", cast=bool, default=False)
 
+# max amount of outgoing requests per minute to each target chat, 0 means no limit
+RATE_PER_MINUTE: int = config("RATE_PER_MINUTE", cast=int, default=0)
+
 USE_MEMORY_DB: bool = config("USE_MEMORY_DB", default=False, cast=bool)
 
 # postgres credentials
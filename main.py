@@ -1,7 +1,7 @@
 import logging
 
 from config import (API_HASH, API_ID, CHAT_MAPPING, DB_URL, DISABLE_DELETE,
-                    DISABLE_EDIT, LOG_LEVEL, REMOVE_URLS)
+                    DISABLE_EDIT, LOG_LEVEL, RATE_PER_MINUTE, REMOVE_URLS)
 from config import REMOVE_URLS_LIST as URLS_BLACKLIST
 from config import REMOVE_URLS_WHITELIST as URLS_WHITELIST
 from config import SESSION_STRING, SOURCE_CHATS, USE_MEMORY_DB
@@ -34,7 +34,8 @@ def main():
         message_filter=message_filter,
         disable_edit=DISABLE_EDIT,
         disable_delete=DISABLE_DELETE,
-        logger=logger
+        logger=logger,
+        rate_per_minute=RATE_PER_MINUTE or None
     )
     client.start_mirroring()
 
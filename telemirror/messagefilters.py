@@ -46,6 +46,8 @@ class UrlMessageFilter(MesssageFilter):
             URLs whitelist. Defaults to {}.
     """
 
+    MENTION_PATTERN = re.compile(r'@[\d\w]*')
+
     def __init__(
         self: 'UrlMessageFilter',
         placeholder: str = '***',
@@ -77,7 +79,7 @@ class UrlMessageFilter(MesssageFilter):
             text = text.replace(url, self._placeholder)
 
         if self._filter_mention:
-            text = re.sub(r'@[\d\w]*', self._placeholder, text)
+            text = self.MENTION_PATTERN.sub(self._placeholder, text)
 
         return text
 
@@ -1,17 +1,51 @@
+import asyncio
+import contextlib
+import functools
 import logging
-from typing import Dict, List, Union
+import signal
+from collections import defaultdict
+from typing import (Awaitable, Callable, Dict, Hashable, List, Optional, Set,
+                    Tuple, TypeVar, Union)
 
-from telethon import events
+from aiolimiter import AsyncLimiter
+from telethon import TelegramClient, events, utils
 from telethon.sessions import StringSession
-from telethon.sync import TelegramClient
 from telethon.tl import types
 
 from .messagefilters import EmptyMessageFilter, MesssageFilter
-from .storage import Database, MirrorMessage
+from .storage import Database, LimitedDict, MirrorMessage
+
+T = TypeVar('T')
+# delayed call task and the call itself
+PendingCall = Tuple[asyncio.Task, Callable[[], Awaitable[None]]]
+
+
+def _safe_handler(handler: Callable[..., Awaitable[None]]) -> Callable[..., Awaitable[None]]:
+    """Logs exceptions raised by **handler** instead of propagating them"""
+
+    @functools.wraps(handler)
+    async def wrapper(self: 'MirrorTelegramClient', *args, **kwargs) -> None:
+        try:
+            await handler(self, *args, **kwargs)
+        except Exception:
+            self._logger.error('%s failed', handler.__name__, exc_info=True)
+
+    return wrapper
+
+
+def _input_media(media: Optional[types.TypeMessageMedia]) -> Optional[types.TypeInputMedia]:
+    """Converts already uploaded message **media** to `InputMedia` that can be sent as is"""
+    if media is None:
+        return None
+    try:
+        return utils.get_input_media(media)
+    except TypeError:
+        return media
 
 
 class EventHandlers:
 
+    @_safe_handler
     async def on_new_message(self: 'MirrorTelegramClient', event) -> None:
         """NewMessage event handler"""
 
@@ -22,69 +56,101 @@ class EventHandlers:
         incoming_message: types.Message = event.message
         incoming_chat: int = event.chat_id
 
-        self._logger.info(
-            f'New message from {incoming_chat}:\n{incoming_message}')
+        self._logger.info('New message from %s#%s', incoming_chat, incoming_message.id)
+        if self._logger.isEnabledFor(logging.DEBUG):
+            self._logger.debug('payload=%s', incoming_message)
 
-        try:
-            outgoing_chats = self._mirror_mapping.get(incoming_chat)
-            if outgoing_chats is None or len(outgoing_chats) < 1:
-                self._logger.warning(f'No target chats for {incoming_chat}.')
-                return
+        outgoing_chats = self._mirror_mapping.get(incoming_chat)
+        if not outgoing_chats:
+            self._logger.warning('No target chats for %s.', incoming_chat)
+            return
 
+        if not self._filter_is_noop:
             incoming_message = self._message_filter.process(incoming_message)
-            for outgoing_chat in outgoing_chats:
-                if isinstance(incoming_message.media, types.MessageMediaPoll):
-                    outgoing_message = await self.send_message(outgoing_chat,
-                                                               file=types.InputMediaPoll(poll=incoming_message.media.poll))
-                else:
-                    outgoing_message = await self.send_message(outgoing_chat, event.message)
-
-                if outgoing_message is not None:
-                    self._database.insert(MirrorMessage(original_id=incoming_message.id,
-                                                        original_channel=incoming_chat,
-                                                        mirror_id=outgoing_message.id,
-                                                        mirror_channel=outgoing_chat))
-        except Exception as e:
-            self._logger.error(e, exc_info=True)
 
+        # one outgoing content object for all targets
+        if isinstance(incoming_message.media, types.MessageMediaPoll):
+            outgoing_content = ''
+            outgoing_file = types.InputMediaPoll(poll=incoming_message.media.poll)
+        else:
+            outgoing_content = incoming_message
+            outgoing_file = None
+
+        outgoing_results = await asyncio.gather(
+            *[self._throttled(outgoing_chat, functools.partial(self.send_message, outgoing_chat, outgoing_content, file=outgoing_file))
+              for outgoing_chat in outgoing_chats],
+            return_exceptions=True)
+
+        mirror_messages = []
+        for outgoing_chat, outgoing_message in zip(outgoing_chats, outgoing_results):
+            if isinstance(outgoing_message, BaseException):
+                self._logger.error(outgoing_message, exc_info=outgoing_message)
+                continue
+
+            if outgoing_message is not None:
+                mirror_messages.append(MirrorMessage(original_id=incoming_message.id,
+                                                     original_channel=incoming_chat,
+                                                     mirror_id=outgoing_message.id,
+                                                     mirror_channel=outgoing_chat))
+
+        self._database.insert_many(mirror_messages)
+        self._cache_mirror_messages(mirror_messages)
+
+    @_safe_handler
     async def on_album(self: 'MirrorTelegramClient', event) -> None:
         """Album event handler"""
 
         incoming_album: List[types.Message] = event.messages
         incoming_chat: int = event.chat_id
 
-        self._logger.info(f'New album from {incoming_chat}')
+        self._logger.info('New album from %s', incoming_chat)
 
-        try:
-            outgoing_chats = self._mirror_mapping.get(incoming_chat)
-            if outgoing_chats is None or len(outgoing_chats) < 1:
-                self._logger.warning(f'No target chats for {incoming_chat}.')
-                return
+        outgoing_chats = self._mirror_mapping.get(incoming_chat)
+        if not outgoing_chats:
+            self._logger.warning('No target chats for %s.', incoming_chat)
+            return
 
-            files = []
-            captions = []
-            source_message_ids = []
+        files = []
+        captions = []
+        source_message_ids = []
 
-            for incoming_message in incoming_album:
+        for incoming_message in incoming_album:
+            if not self._filter_is_noop:
                 incoming_message = self._message_filter.process(
                     incoming_message)
-                files.append(incoming_message.media)
-                captions.append(incoming_message.message)
-                source_message_ids.append(incoming_message.id)
-
-            for outgoing_chat in outgoing_chats:
-                outgoing_messages = await self.send_file(
-                    outgoing_chat, caption=captions, file=files)
-
-                if outgoing_messages is not None and len(outgoing_messages) > 1:
-                    for i, outgoing_message in enumerate(outgoing_messages):
-                        self._database.insert(MirrorMessage(original_id=source_message_ids[i],
-                                                            original_channel=incoming_chat,
-                                                            mirror_id=outgoing_message.id,
-                                                            mirror_channel=outgoing_chat))
-        except Exception as e:
-            self._logger.error(e, exc_info=True)
+            files.append(incoming_message.media)
+            captions.append(incoming_message.message)
+            source_message_ids.append(incoming_message.id)
+
+        if not any(file is not None for file in files) and not any(captions):
+            self._logger.warning('Nothing to send for album from %s.', incoming_chat)
+            return
+
+        files = [_input_media(file) for file in files]
+
+        outgoing_results = await asyncio.gather(
+            *[self._throttled(outgoing_chat, functools.partial(self.send_file, outgoing_chat, caption=captions, file=files))
+              for outgoing_chat in outgoing_chats],
+            return_exceptions=True)
+
+        mirror_messages = []
+        add_mirror_message = mirror_messages.append
+        for outgoing_chat, outgoing_messages in zip(outgoing_chats, outgoing_results):
+            if isinstance(outgoing_messages, BaseException):
+                self._logger.error(outgoing_messages, exc_info=outgoing_messages)
+                continue
+
+            if outgoing_messages is not None and len(outgoing_messages) > 1:
+                for i, outgoing_message in enumerate(outgoing_messages):
+                    add_mirror_message(MirrorMessage(original_id=source_message_ids[i],
+                                                     original_channel=incoming_chat,
+                                                     mirror_id=outgoing_message.id,
+                                                     mirror_channel=outgoing_chat))
+
+        self._database.insert_many(mirror_messages)
+        self._cache_mirror_messages(mirror_messages)
 
+    @_safe_handler
     async def on_edit_message(self: 'MirrorTelegramClient', event) -> None:
         """MessageEdited event handler"""
 
@@ -95,54 +161,245 @@ class EventHandlers:
         incoming_message: types.Message = event.message
         incoming_chat: int = event.chat_id
 
-        self._logger.info(
-            f'Edit message from {incoming_chat}#{incoming_message.id}')
+        self._logger.info('Edit message from %s#%s', incoming_chat, incoming_message.id)
 
-        try:
-            outgoing_messages = self._database.get_messages(
-                incoming_message.id, incoming_chat)
-            if outgoing_messages is None or len(outgoing_messages) < 1:
-                self._logger.warning(
-                    f'No target messages for {incoming_chat}.')
-                return
+        # only the last edit within the debounce delay is mirrored
+        self._call_later(self._pending_edits, (incoming_chat, incoming_message.id), self.EDIT_DEBOUNCE_DELAY,
+                         functools.partial(self._mirror_edit, incoming_chat, incoming_message))
+
+    @_safe_handler
+    async def _mirror_edit(self: 'MirrorTelegramClient', incoming_chat: int, incoming_message: types.Message) -> None:
+        """Applies edited **incoming_message** to all its mirrors
+
+        Args:
+            incoming_chat (`int`): Source chat ID
+            incoming_message (`types.Message`): Edited message
+        """
+        outgoing_messages = self._get_mirror_messages(
+            incoming_message.id, incoming_chat)
+        if outgoing_messages is None or len(outgoing_messages) < 1:
+            self._logger.warning('No target messages for %s.', incoming_chat)
+            return
 
+        if not self._filter_is_noop:
             incoming_message = self._message_filter.process(incoming_message)
-            for outgoing_message in outgoing_messages:
-                await self.edit_message(outgoing_message.mirror_channel, outgoing_message.mirror_id, incoming_message.message)
-        except Exception as e:
-            self._logger.error(e, exc_info=True)
+        edit_results = await asyncio.gather(
+            *[self._throttled(outgoing_message.mirror_channel,
+                              functools.partial(self.edit_message, outgoing_message.mirror_channel, outgoing_message.mirror_id, incoming_message.message))
+              for outgoing_message in outgoing_messages],
+            return_exceptions=True)
+
+        for edit_result in edit_results:
+            if isinstance(edit_result, BaseException):
+                self._logger.error(edit_result, exc_info=edit_result)
 
+    @_safe_handler
     async def on_deleted_message(self: 'MirrorTelegramClient', event) -> None:
         """MessageDeleted event handler"""
 
         deleted_ids: List[int] = event.deleted_ids
         incoming_chat: int = event.chat_id
 
-        self._logger.info(
-            f'Delete {len(deleted_ids)} messages from {incoming_chat}')
+        self._logger.info('Delete %s messages from %s', len(deleted_ids), incoming_chat)
+
+        delete_queue = self._delete_queues.setdefault(incoming_chat, [])
+        delete_queue.extend(deleted_ids)
+
+        if len(delete_queue) >= self.DELETE_BATCH_SIZE:
+            # flush right away, but not inside this handler: Telethon cancels handlers on disconnect
+            self._call_later(self._pending_flushes, incoming_chat, 0,
+                             functools.partial(self._flush_deletes, incoming_chat))
+        elif incoming_chat not in self._pending_flushes:
+            self._call_later(self._pending_flushes, incoming_chat, self.DELETE_FLUSH_DELAY,
+                             functools.partial(self._flush_deletes, incoming_chat))
 
+    @_safe_handler
+    async def _flush_deletes(self: 'MirrorTelegramClient', incoming_chat: int) -> None:
+        """Deletes mirrors of all queued deleted messages of **incoming_chat**
+
+        Args:
+            incoming_chat (`int`): Source chat ID
+        """
+        delete_queue = self._delete_queues.get(incoming_chat)
+        if not delete_queue or incoming_chat in self._flushing_chats:
+            # a running flush also takes the newly queued IDs
+            return
+
+        self._flushing_chats.add(incoming_chat)
         try:
-            for deleted_id in deleted_ids:
-                deleting_messages = self._database.get_messages(deleted_id, incoming_chat)
-                if deleting_messages is None or len(deleting_messages) < 1:
-                    self._logger.warning(
-                        f'No target messages for {incoming_chat} and message#{deleted_id}.')
-                    continue
+            while delete_queue:
+                deleted_ids = delete_queue[:]
+                await self._delete_mirrors(incoming_chat, deleted_ids)
+                # handled IDs leave the queue only now: an interrupted flush is retried by `_drain_pending`
+                del delete_queue[:len(deleted_ids)]
+            del self._delete_queues[incoming_chat]
+        finally:
+            self._flushing_chats.discard(incoming_chat)
+
+    async def _delete_mirrors(self: 'MirrorTelegramClient', incoming_chat: int, deleted_ids: List[int]) -> None:
+        """Deletes mirrors of **deleted_ids** and their stored mapping
 
-                self._database.delete_messages(deleted_id, incoming_chat)
+        Args:
+            incoming_chat (`int`): Source chat ID
+            deleted_ids (`List[int]`): Deleted message IDs
 
-                for deleting_message in deleting_messages:
-                    try:
-                        await self.delete_messages(deleting_message.mirror_channel, deleting_message.mirror_id)
-                    except Exception as e:
-                        self._logger.error(e, exc_info=True)
+        Raises:
+            `asyncio.CancelledError` | `ConnectionError`: Client was disconnected meanwhile
+        """
+        deleting_messages = self._database.get_messages_bulk(
+            deleted_ids, incoming_chat)
 
-        except Exception as e:
-            self._logger.error(e, exc_info=True)
+        by_channel: Dict[int, List[int]] = defaultdict(list)
+        for deleted_id in deleted_ids:
+            if deleted_id not in deleting_messages:
+                self._logger.warning(
+                    'No target messages for %s and message#%s.', incoming_chat, deleted_id)
+                continue
+
+            for deleting_message in deleting_messages[deleted_id]:
+                by_channel[deleting_message.mirror_channel].append(
+                    deleting_message.mirror_id)
+
+        # Telethon splits each list into chunks of 100 IDs per request
+        delete_results = await asyncio.gather(
+            *[self._throttled(mirror_channel, functools.partial(self.delete_messages, mirror_channel, mirror_ids))
+              for mirror_channel, mirror_ids in by_channel.items()],
+            return_exceptions=True)
+
+        for delete_result in delete_results:
+            if isinstance(delete_result, (asyncio.CancelledError, ConnectionError)):
+                # keep the mapping so that the retry finds the mirrors again
+                raise delete_result
+            if isinstance(delete_result, BaseException):
+                self._logger.error(delete_result, exc_info=delete_result)
+
+        self._database.delete_messages_bulk(
+            list(deleting_messages.keys()), incoming_chat)
+        for deleted_id in deleted_ids:
+            self._msg_cache.pop((incoming_chat, deleted_id), None)
+
+    def _call_later(self: 'MirrorTelegramClient', pending: Dict[Hashable, PendingCall], key: Hashable,
+                    delay: float, call: Callable[[], Awaitable[None]]) -> None:
+        """Schedules **call** in **delay** seconds, replacing not yet started call with the same **key**
+
+        Args:
+            pending (`Dict[Hashable, PendingCall]`): Not yet started calls
+            key (`Hashable`): Call key
+            delay (`float`): Delay in seconds
+            call (`Callable[[], Awaitable[None]]`): Delayed call
+        """
+        self._cancel_call(pending, key)
+        delayed_task = asyncio.create_task(
+            self._delayed_call(pending, key, delay, call))
+        # kept until done, so that `_drain_pending` can await already started calls
+        self._delayed_tasks.add(delayed_task)
+        delayed_task.add_done_callback(self._delayed_tasks.discard)
+        pending[key] = (delayed_task, call)
+
+    def _cancel_call(self: 'MirrorTelegramClient', pending: Dict[Hashable, PendingCall], key: Hashable) -> None:
+        """Cancels not yet started call with **key**
+
+        Args:
+            pending (`Dict[Hashable, PendingCall]`): Not yet started calls
+            key (`Hashable`): Call key
+        """
+        pending_call = pending.pop(key, None)
+        if pending_call is not None:
+            pending_call[0].cancel()
+
+    async def _delayed_call(self: 'MirrorTelegramClient', pending: Dict[Hashable, PendingCall], key: Hashable,
+                            delay: float, call: Callable[[], Awaitable[None]]) -> None:
+        """Awaits **call** after **delay** seconds
+
+        Args:
+            pending (`Dict[Hashable, PendingCall]`): Not yet started calls
+            key (`Hashable`): Call key
+            delay (`float`): Delay in seconds
+            call (`Callable[[], Awaitable[None]]`): Delayed call
+        """
+        await asyncio.sleep(delay)
+        # unregister before the call: a pending call is only cancelled while sleeping
+        pending.pop(key, None)
+        await call()
+
+    async def _run_pending_calls(self: 'MirrorTelegramClient', pending: Dict[Hashable, PendingCall]) -> None:
+        """Runs all not yet started calls right away
+
+        Args:
+            pending (`Dict[Hashable, PendingCall]`): Not yet started calls
+        """
+        while pending:
+            _, (task, call) = pending.popitem()
+            task.cancel()
+            await call()
+
+    async def _throttled(self: 'MirrorTelegramClient', outgoing_chat: int, request: Callable[[], Awaitable[T]]) -> T:
+        """Makes outgoing **request** within the rate limit of **outgoing_chat**
+        and the limit of concurrent outgoing requests. A request that waits for the rate limit
+        longer than `RATE_LIMIT_TIMEOUT` seconds is sent anyway
+
+        Args:
+            outgoing_chat (`int`): Target chat ID
+            request (`Callable[[], Awaitable[T]]`): Outgoing request, created only once a slot is taken
+
+        Returns:
+            `T`: Request result
+        """
+        rate_limiter = self._rate_limiters.get(outgoing_chat)
+        if rate_limiter is not None:
+            try:
+                await asyncio.wait_for(rate_limiter.acquire(), self.RATE_LIMIT_TIMEOUT)
+            except asyncio.TimeoutError:
+                self._logger.warning('Rate limit of %s exceeded for %s seconds, sending anyway',
+                                     outgoing_chat, self.RATE_LIMIT_TIMEOUT)
+        async with self._send_sem:
+            return await request()
+
+    def _get_mirror_messages(self: 'MirrorTelegramClient', original_id: int, original_channel: int) -> List[MirrorMessage]:
+        """Finds `MirrorMessage` objects of the original message, cached ones first
+
+        Args:
+            original_id (`int`): Original message ID
+            original_channel (`int`): Source channel ID
+
+        Returns:
+            List[MirrorMessage]
+        """
+        key = (original_channel, original_id)
+        try:
+            return self._msg_cache[key]
+        except KeyError:
+            pass
+
+        mirror_messages = self._database.get_messages(
+            original_id, original_channel)
+        if mirror_messages:
+            self._msg_cache[key] = mirror_messages
+        return mirror_messages
+
+    def _cache_mirror_messages(self: 'MirrorTelegramClient', mirror_messages: List[MirrorMessage]) -> None:
+        """Puts just stored `MirrorMessage` objects into the lookup cache
+
+        Args:
+            mirror_messages (`List[MirrorMessage]`): `MirrorMessage` objects
+        """
+        grouped: Dict[Tuple[int, int], List[MirrorMessage]] = {}
+        for mirror_message in mirror_messages:
+            grouped.setdefault((mirror_message.original_channel, mirror_message.original_id),
+                               []).append(mirror_message)
+
+        for key, value in grouped.items():
+            self._msg_cache[key] = value
 
 
 class Mirroring(EventHandlers):
 
+    MESSAGE_CACHE_SIZE = 4096
+    DELETE_BATCH_SIZE = 50
+    DELETE_FLUSH_DELAY = 10
+    EDIT_DEBOUNCE_DELAY = 1.5
+    RATE_LIMIT_TIMEOUT = 60
+
     def configure_mirroring(
         self: 'MirrorTelegramClient',
         source_chats: List[int],
@@ -151,7 +408,9 @@ class Mirroring(EventHandlers):
         message_filter: MesssageFilter = EmptyMessageFilter(),
         disable_edit: bool = False,
         disable_delete: bool = False,
-        logger: Union[str, logging.Logger] = None
+        logger: Union[str, logging.Logger] = None,
+        max_concurrency: int = 8,
+        rate_per_minute: Optional[int] = None
     ) -> None:
         """Configure channels mirroring
 
@@ -163,10 +422,34 @@ class Mirroring(EventHandlers):
             disable_edit (`bool`, optional): Disable mirror message editing. Defaults to `False`.
             disable_delete (`bool`, optional): Disable mirror message deleting. Defaults to `False`.
             logger (`str` | `logging.Logger`, optional): Logger. Defaults to None.
+            max_concurrency (`int`, optional): Max amount of concurrent outgoing requests. Defaults to 8.
+            rate_per_minute (`int`, optional): Max amount of outgoing requests per minute to each target chat.
+                Defaults to None (no limit).
         """
+        if max_concurrency < 1:
+            raise ValueError('max_concurrency must be a positive integer')
+        if rate_per_minute is not None and rate_per_minute < 1:
+            raise ValueError('rate_per_minute must be a positive integer or None')
+
         self._database = database
-        self._mirror_mapping = mirror_mapping
+        self._mirror_mapping: Dict[int, Tuple[int, ...]] = {
+            source: tuple(targets) for source, targets in mirror_mapping.items()}
         self._message_filter = message_filter
+        # subclasses of EmptyMessageFilter that override process are real filters
+        self._filter_is_noop = type(message_filter).process is EmptyMessageFilter.process
+        self._msg_cache: Dict[Tuple[int, int], List[MirrorMessage]] = LimitedDict(
+            capacity=self.MESSAGE_CACHE_SIZE)
+        self._delete_queues: Dict[int, List[int]] = {}
+        self._pending_flushes: Dict[int, PendingCall] = {}
+        self._pending_edits: Dict[Tuple[int, int], PendingCall] = {}
+        self._delayed_tasks: Set[asyncio.Task] = set()
+        self._flushing_chats: Set[int] = set()
+        self._send_sem = asyncio.Semaphore(max_concurrency)
+        self._rate_limiters: Dict[int, AsyncLimiter] = {
+            outgoing_chat: AsyncLimiter(rate_per_minute, 60)
+            for outgoing_chats in self._mirror_mapping.values()
+            for outgoing_chat in outgoing_chats
+        } if rate_per_minute is not None else {}
 
         if isinstance(logger, str):
             logger = logging.getLogger(logger)
@@ -175,6 +458,10 @@ class Mirroring(EventHandlers):
 
         self._logger = logger
 
+        # Telethon resolves `chats` into a set of IDs once, which makes per-update
+        # checks O(1); it only accepts list, tuple, set or dict here (not frozenset)
+        source_chats = set(source_chats)
+
         self.add_event_handler(self.on_new_message,
                                events.NewMessage(chats=source_chats))
         self.add_event_handler(self.on_album, events.Album(chats=source_chats))
@@ -189,15 +476,49 @@ class Mirroring(EventHandlers):
 
     def start_mirroring(self: 'MirrorTelegramClient') -> None:
         """Start channels mirroring"""
-        self.start()
-        if self.is_user_authorized():
-            me = self.get_me()
-            self._logger.info(f'Authorized as {me.username} ({me.phone})')
+        try:
+            asyncio.run(self._run_mirroring())
+        except KeyboardInterrupt:
+            pass
+
+    async def _run_mirroring(self: 'MirrorTelegramClient') -> None:
+        """Connect and mirror channels until disconnected"""
+        await self.start()
+        if await self.is_user_authorized():
+            me = await self.get_me()
+            self._logger.info('Authorized as %s (%s)', me.username, me.phone)
             self._logger.info('Channels mirroring was started...')
-            self.run_until_disconnected()
+            with contextlib.suppress(NotImplementedError):
+                # graceful stop on platform shutdown (e.g. Heroku dyno restart)
+                asyncio.get_running_loop().add_signal_handler(
+                    signal.SIGTERM, lambda: asyncio.ensure_future(self.disconnect()))
+            try:
+                await self.run_until_disconnected()
+            finally:
+                await self._drain_pending()
         else:
             self._logger.error('Cannot be authorized. Try to restart')
 
+    @_safe_handler
+    async def _drain_pending(self: 'MirrorTelegramClient') -> None:
+        """Mirrors pending edits and queued deletions right away instead of losing them on shutdown"""
+        if not self._delayed_tasks and not self._delete_queues:
+            return
+
+        self._logger.info('Mirroring pending edits and deletions before shutdown...')
+        # the client is usually disconnected by now
+        if not self.is_connected():
+            await self.connect()
+        try:
+            await self._run_pending_calls(self._pending_edits)
+            await self._run_pending_calls(self._pending_flushes)
+            # calls started before the disconnect, interrupted flushes keep their IDs queued
+            await asyncio.gather(*self._delayed_tasks, return_exceptions=True)
+            for incoming_chat in list(self._delete_queues):
+                await self._flush_deletes(incoming_chat)
+        finally:
+            await self.disconnect()
+
 
 class MirrorTelegramClient(Mirroring, TelegramClient):
 
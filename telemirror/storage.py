@@ -2,12 +2,42 @@ import collections
 import logging
 from abc import abstractmethod
 from contextlib import contextmanager
-from typing import List, Protocol
+from typing import Dict, List, Protocol, Tuple
 
 from psycopg2 import pool
+from psycopg2.extras import execute_values
 from psycopg2.extensions import AsIs, ISQLQuote, adapt
 
 
+class LimitedDict(collections.OrderedDict):
+    """
+    Dict with a limited length, ejecting LRUs as needed.
+    """
+
+    def __init__(self, *args, capacity, free_factor=0.5, **kwargs):
+        assert capacity > 0
+        assert free_factor > 0.1 and free_factor <= 1.0
+        self.capacity = capacity
+        self.keep_last = max(1.0, capacity * (1.0 - free_factor))
+
+        super().__init__(*args, **kwargs)
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        super().move_to_end(key)
+
+        if len(self) > self.capacity:
+            while len(self) > self.keep_last:
+                oldkey = next(iter(self))
+                super().__delitem__(oldkey)
+
+    def __getitem__(self, key):
+        val = super().__getitem__(key)
+        super().move_to_end(key)
+
+        return val
+
+
 class MirrorMessage:
     """
     Mirror message class contains id message mappings:
@@ -21,6 +51,9 @@ class MirrorMessage:
         mirror_channel (`int`): Mirror channel ID
     """
 
+    __slots__ = ('original_id', 'original_channel',
+                 'mirror_id', 'mirror_channel')
+
     def __init__(self, original_id: int, original_channel: int,
                  mirror_id: int, mirror_channel: int):
         self.original_id = original_id
@@ -29,7 +62,8 @@ class MirrorMessage:
         self.mirror_channel = mirror_channel
 
     def __str__(self):
-        return f'{self.__class__}: {self.__dict__}'
+        fields = {name: getattr(self, name) for name in self.__slots__}
+        return f'{self.__class__}: {fields}'
 
     def __repr__(self):
         return self.__str__()
@@ -67,6 +101,15 @@ class Database(Protocol):
         """
         raise NotImplementedError
 
+    def insert_many(self: 'Database', entities: List[MirrorMessage]) -> None:
+        """Inserts `MirrorMessage` objects into database
+
+        Args:
+            entities (`List[MirrorMessage]`): `MirrorMessage` objects
+        """
+        for entity in entities:
+            self.insert(entity)
+
     @abstractmethod
     def get_messages(self: 'Database', original_id: int, original_channel: int) -> List[MirrorMessage]:
         """
@@ -81,6 +124,24 @@ class Database(Protocol):
         """
         raise NotImplementedError
 
+    def get_messages_bulk(self: 'Database', original_ids: List[int], original_channel: int) -> Dict[int, List[MirrorMessage]]:
+        """
+        Finds `MirrorMessage` objects for every ID of `original_ids` within `original_channel`
+
+        Args:
+            original_ids (`List[int]`): Original message IDs
+            original_channel (`int`): Source channel ID
+
+        Returns:
+            Dict[int, List[MirrorMessage]]: Found objects by original message ID
+        """
+        found = {}
+        for original_id in original_ids:
+            messages = self.get_messages(original_id, original_channel)
+            if messages:
+                found[original_id] = messages
+        return found
+
     @abstractmethod
     def delete_messages(self: 'Database', original_id: int, original_channel: int) -> None:
         """
@@ -92,6 +153,17 @@ class Database(Protocol):
         """
         raise NotImplementedError
 
+    def delete_messages_bulk(self: 'Database', original_ids: List[int], original_channel: int) -> None:
+        """
+        Deletes `MirrorMessage` objects for every ID of `original_ids` within `original_channel`
+
+        Args:
+            original_ids (`List[int]`): Original message IDs
+            original_channel (`int`): Source channel ID
+        """
+        for original_id in original_ids:
+            self.delete_messages(original_id, original_channel)
+
 
 class InMemoryDatabase(Database):
     """
@@ -102,38 +174,12 @@ class InMemoryDatabase(Database):
     - Get `MirrorMessage` object from database by original message ID
     """
 
-    class LimitedDict(collections.OrderedDict):
-        """
-        Dict with a limited length, ejecting LRUs as needed.
-        """
-
-        def __init__(self, *args, capacity, free_factor=0.5, **kwargs):
-            assert capacity > 0
-            assert free_factor > 0.1 and free_factor <= 1.0
-            self.capacity = capacity
-            self.keep_last = max(1.0, capacity * (1.0 - free_factor))
-
-            super().__init__(*args, **kwargs)
-
-        def __setitem__(self, key, value):
-            super().__setitem__(key, value)
-            super().move_to_end(key)
-
-            if len(self) > self.capacity:
-                while len(self) > self.keep_last:
-                    oldkey = next(iter(self))
-                    super().__delitem__(oldkey)
-
-        def __getitem__(self, key):
-            val = super().__getitem__(key)
-            super().move_to_end(key)
-
-            return val
+    LimitedDict = LimitedDict
 
     MAX_CAPACITY = 100
 
     def __init__(self: 'InMemoryDatabase', max_capacity: int = MAX_CAPACITY):
-        self.__stored = self.LimitedDict[str, List[MirrorMessage]](
+        self.__stored = LimitedDict[Tuple[int, int], List[MirrorMessage]](
             capacity=max_capacity)
 
     def insert(self: 'InMemoryDatabase', entity: MirrorMessage) -> None:
@@ -145,6 +191,16 @@ class InMemoryDatabase(Database):
         self.__stored.setdefault(self.__build_message_hash(
             entity.original_id, entity.original_channel), []).append(entity)
 
+    def insert_many(self: 'InMemoryDatabase', entities: List[MirrorMessage]) -> None:
+        """Inserts `MirrorMessage` objects into database
+
+        Args:
+            entities (`List[MirrorMessage]`): `MirrorMessage` objects
+        """
+        for entity in entities:
+            self.__stored.setdefault(self.__build_message_hash(
+                entity.original_id, entity.original_channel), []).append(entity)
+
     def get_messages(self: 'InMemoryDatabase', original_id: int, original_channel: int) -> List[MirrorMessage]:
         """
         Finds `MirrorMessage` objects with `original_id` and `original_channel` values
@@ -158,6 +214,25 @@ class InMemoryDatabase(Database):
         """
         return self.__stored.get(self.__build_message_hash(original_id, original_channel), None)
 
+    def get_messages_bulk(self: 'InMemoryDatabase', original_ids: List[int], original_channel: int) -> Dict[int, List[MirrorMessage]]:
+        """
+        Finds `MirrorMessage` objects for every ID of `original_ids` within `original_channel`
+
+        Args:
+            original_ids (`List[int]`): Original message IDs
+            original_channel (`int`): Source channel ID
+
+        Returns:
+            Dict[int, List[MirrorMessage]]: Found objects by original message ID
+        """
+        found = {}
+        for original_id in original_ids:
+            messages = self.__stored.get(
+                self.__build_message_hash(original_id, original_channel), None)
+            if messages:
+                found[original_id] = messages
+        return found
+
     def delete_messages(self: 'InMemoryDatabase', original_id: int, original_channel: int) -> None:
         """
         Deletes `MirrorMessage` objects with `original_id` and `original_channel` values
@@ -171,7 +246,19 @@ class InMemoryDatabase(Database):
         except KeyError:
             pass
 
-    def __build_message_hash(self: 'InMemoryDatabase', original_id: int, original_channel: int) -> str:
+    def delete_messages_bulk(self: 'InMemoryDatabase', original_ids: List[int], original_channel: int) -> None:
+        """
+        Deletes `MirrorMessage` objects for every ID of `original_ids` within `original_channel`
+
+        Args:
+            original_ids (`List[int]`): Original message IDs
+            original_channel (`int`): Source channel ID
+        """
+        for original_id in original_ids:
+            self.__stored.pop(self.__build_message_hash(
+                original_id, original_channel), None)
+
+    def __build_message_hash(self: 'InMemoryDatabase', original_id: int, original_channel: int) -> Tuple[int, int]:
         """
         Builds message hash from `original_id` and `original_channel` values
 
@@ -180,9 +267,9 @@ class InMemoryDatabase(Database):
             original_channel (`int`): Source channel ID
 
         Returns:
-            str
+            Tuple[int, int]
         """
-        return f'{original_channel}:{original_id}'
+        return original_channel, original_id
 
 
 class PostgresDatabase(Database):
@@ -228,8 +315,32 @@ class PostgresDatabase(Database):
             try:
                 cursor.execute("""
                                 INSERT INTO binding_id (original_id, original_channel, mirror_id, mirror_channel)
-                                VALUES (%s)
-                                """, (entity,))
+                                VALUES (%s, %s, %s, %s)
+                                """, (entity.original_id, entity.original_channel,
+                                      entity.mirror_id, entity.mirror_channel,))
+            except Exception as e:
+                self.__logger.error(e, exc_info=True)
+                connection.rollback()
+            else:
+                connection.commit()
+
+    def insert_many(self: 'PostgresDatabase', entities: List[MirrorMessage]) -> None:
+        """Inserts `MirrorMessage` objects into database with a single multi-row `INSERT`
+
+        Args:
+            entities (`List[MirrorMessage]`): `MirrorMessage` objects
+        """
+        if not entities:
+            return
+
+        with self.__db() as (connection, cursor):
+            try:
+                execute_values(cursor, """
+                                INSERT INTO binding_id (original_id, original_channel, mirror_id, mirror_channel)
+                                VALUES %s
+                                """, [(entity.original_id, entity.original_channel,
+                                       entity.mirror_id, entity.mirror_channel)
+                                      for entity in entities])
             except Exception as e:
                 self.__logger.error(e, exc_info=True)
                 connection.rollback()
@@ -262,6 +373,39 @@ class PostgresDatabase(Database):
                 rows = cursor.fetchall()
         return [MirrorMessage(*row) for row in rows] if rows else None
 
+    def get_messages_bulk(self: 'PostgresDatabase', original_ids: List[int], original_channel: int) -> Dict[int, List[MirrorMessage]]:
+        """
+        Finds `MirrorMessage` objects for every ID of `original_ids` within `original_channel`
+
+        Args:
+            original_ids (`List[int]`): Original message IDs
+            original_channel (`int`): Source channel ID
+
+        Returns:
+            Dict[int, List[MirrorMessage]]: Found objects by original message ID
+        """
+        found = {}
+        if not original_ids:
+            return found
+
+        rows = None
+        with self.__db() as (_, cursor):
+            try:
+                cursor.execute("""
+                                SELECT original_id, original_channel, mirror_id, mirror_channel
+                                FROM binding_id
+                                WHERE original_id = ANY(%s)
+                                AND original_channel = %s
+                                """, (list(original_ids), original_channel,))
+            except Exception as e:
+                self.__logger.error(e, exc_info=True)
+            else:
+                rows = cursor.fetchall()
+
+        for row in rows or []:
+            found.setdefault(row[0], []).append(MirrorMessage(*row))
+        return found
+
     def delete_messages(self: 'PostgresDatabase', original_id: int, original_channel: int) -> None:
         """
         Deletes `MirrorMessage` objects with `original_id` and `original_channel` values
@@ -283,6 +427,30 @@ class PostgresDatabase(Database):
             else:
                 connection.commit()
 
+    def delete_messages_bulk(self: 'PostgresDatabase', original_ids: List[int], original_channel: int) -> None:
+        """
+        Deletes `MirrorMessage` objects for every ID of `original_ids` within `original_channel`
+
+        Args:
+            original_ids (`List[int]`): Original message IDs
+            original_channel (`int`): Source channel ID
+        """
+        if not original_ids:
+            return
+
+        with self.__db() as (connection, cursor):
+            try:
+                cursor.execute("""
+                                DELETE FROM binding_id
+                                WHERE original_id = ANY(%s)
+                                AND original_channel = %s
+                                """, (list(original_ids), original_channel,))
+            except Exception as e:
+                self.__logger.error(e, exc_info=True)
+                connection.rollback()
+            else:
+                connection.commit()
+
     @contextmanager
     def __db(self: 'PostgresDatabase'):
         """